@@ -1,76 +1,423 @@
 """
 Script to convert CSV files in output/ folder to Parquet format
 """
+import argparse
+import logging
 import os
-import pandas as pd
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+# Polars is optional (alternative conversion engine)
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Numeric columns written by scrape_etmoney_multicap.py. Pinning their type keeps
+# every CSV on the same schema, even when a column happens to be empty in one file.
+# float32 (about 7 significant digits) is plenty for the 2-decimal ratios and
+# percentages and halves their size on disk and in memory.
+NUMERIC_COLUMNS = [
+    'fund_age_years', 'aum_cr', 'expense_ratio', 'alpha', 'sharpe', 'beta', 'sd',
+    'large_cap_pct', 'mid_cap_pct', 'small_cap_pct', 'other_cap_pct',
+    'return_1m', 'return_3m', 'return_6m', 'return_1y', 'return_3y', 'return_5y',
+    'return_since_inception'
+]
+
+# AUM reaches six figures in crores (e.g. 129323.74), which needs 8 significant
+# digits; float32 would lose the paise, so these stay float64
+FLOAT64_COLUMNS = ['aum_cr']
+
+# Tokens read as null in numeric columns. This is pyarrow.csv's default list; it is
+# passed to both engines so they agree on cells like 'N/A'.
+CSV_NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null'
+]
+
+# Text columns written by the scraper. Pinned to string so a file whose fund_name
+# column is entirely empty isn't inferred as null.
+STRING_COLUMNS = ['fund_name', 'fund_url']
+
+# Schema of all_funds.parquet. Every CSV is conformed to it before writing, so files
+# are never dropped for a missing or differently-inferred column.
+FUNDS_SCHEMA = pa.schema(
+    [(col, pa.string()) for col in STRING_COLUMNS] +
+    [(col, pa.float64() if col in FLOAT64_COLUMNS else pa.float32()) for col in NUMERIC_COLUMNS] +
+    [('fund_category', pa.dictionary(pa.int32(), pa.string()))]
+)
+
+# Parquet layout tuned for the dashboard: zstd pages, dictionary-encoded labels,
+# byte-stream-split floats (compresses better) and min/max statistics per row group
+PARQUET_WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': ['fund_category', 'fund_name'],
+    'use_byte_stream_split': NUMERIC_COLUMNS,
+    'data_page_size': 1 << 20,
+    'write_statistics': True,
+}
+ROW_GROUP_SIZE = 256_000
+
+RETURN_COLUMNS = [
+    'return_1m', 'return_3m', 'return_6m', 'return_1y', 'return_3y', 'return_5y',
+    'return_since_inception'
+]
+
+# (x, y) axis pairs offered by the "View Type" selector in reports/Category_Explorer.py
+CATEGORY_VIEWS = (
+    [('sd', col) for col in RETURN_COLUMNS] +
+    [('expense_ratio', col) for col in RETURN_COLUMNS] +
+    [('expense_ratio', 'sharpe'), ('beta', 'alpha')]
+)
+
+# Metrics averaged (AUM-weighted) per category for every view
+CATEGORY_STAT_COLUMNS = ['sd', 'expense_ratio', 'beta', 'sharpe', 'alpha'] + RETURN_COLUMNS
+
+
+def build_category_stats(df):
+    """
+    Compute AUM-weighted category averages for every Category Explorer view.
+
+    For each (x, y) view only funds with both axis values are used, matching
+    what the dashboard plots. Averages fall back to a plain mean for
+    categories without any AUM.
+
+    Args:
+        df: Fund-level DataFrame as written to all_funds.parquet
+
+    Returns:
+        DataFrame with one row per (view_x, view_y, fund_category)
+    """
+    # Sort rows by category once; every aggregate below is a np.add.reduceat over
+    # the resulting contiguous groups, with all metric columns reduced together
+    fund_category = df['fund_category'].astype('category')
+    codes = fund_category.cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    group_categories = fund_category.cat.categories[codes[starts]]
+
+    values = df[CATEGORY_STAT_COLUMNS].to_numpy(dtype=np.float64)[order]
+    aum = df['aum_cr'].fillna(0).to_numpy(dtype=np.float64)[order]
+    has_value = ~np.isnan(values)
+    col_index = {col: i for i, col in enumerate(CATEGORY_STAT_COLUMNS)}
+
+    all_stats = []
+    for x_col, y_col in CATEGORY_VIEWS:
+        in_view = has_value[:, col_index[x_col]] & has_value[:, col_index[y_col]]
+        counted = has_value & in_view[:, None]
+        weights = np.where(in_view, aum, 0.0)
+
+        num_funds = np.add.reduceat(in_view.astype(np.int32), starts)
+        total_aum = np.add.reduceat(weights, starts)
+        weighted_sums = np.add.reduceat(np.where(counted, values * weights[:, None], 0.0), starts, axis=0)
+        plain_sums = np.add.reduceat(np.where(counted, values, 0.0), starts, axis=0)
+        plain_counts = np.add.reduceat(counted, starts, axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(
+                (total_aum > 0)[:, None],
+                weighted_sums / total_aum[:, None],
+                plain_sums / plain_counts
+            )
+
+        # Only categories with at least one fund in this view
+        present = num_funds > 0
+        stats = pd.DataFrame(averages[present], columns=CATEGORY_STAT_COLUMNS)
+        stats.insert(0, 'fund_category', pd.Categorical(group_categories[present], categories=fund_category.cat.categories))
+        stats.insert(0, 'view_y', y_col)
+        stats.insert(0, 'view_x', x_col)
+        stats['aum_cr'] = total_aum[present]
+        stats['num_funds'] = num_funds[present].astype(np.int32)
+        all_stats.append(stats)
+
+    return pd.concat(all_stats, ignore_index=True)
+
+
+def _read_one(csv_file):
+    """
+    Read a single CSV into an Arrow table tagged with its fund category.
+
+    Runs in a worker process, so it only returns data; the Parquet file is
+    written by the parent.
+
+    Args:
+        csv_file: Path to the CSV file
+
+    Returns:
+        Tuple of (fund category, pyarrow Table or None if the file could not be read)
+    """
+    # Extract fund name from filename (e.g., etmoney_largecap.csv -> largecap)
+    fund_name = csv_file.stem.replace('etmoney_', '')
+
+    try:
+        table = pv.read_csv(
+            csv_file,
+            read_options=pv.ReadOptions(use_threads=True, block_size=32 << 20),
+            convert_options=pv.ConvertOptions(
+                null_values=CSV_NULL_VALUES,
+                column_types={field.name: field.type for field in FUNDS_SCHEMA if field.name != 'fund_category'}
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error reading {csv_file.name}: {e}")
+        return fund_name, None
+
+    extra_columns = set(table.column_names) - set(FUNDS_SCHEMA.names)
+    if extra_columns:
+        logger.warning(f"Ignoring unknown columns in {csv_file.name}: {', '.join(sorted(extra_columns))}")
+
+    # Conform to FUNDS_SCHEMA: missing columns become nulls, fund_category is added
+    columns = []
+    for field in FUNDS_SCHEMA:
+        if field.name == 'fund_category':
+            columns.append(pa.array([fund_name] * table.num_rows, type=field.type))
+        elif field.name in table.column_names:
+            columns.append(table[field.name])
+        else:
+            logger.warning(f"{csv_file.name} has no '{field.name}' column, filling with nulls")
+            columns.append(pa.nulls(table.num_rows, type=field.type))
+
+    return fund_name, pa.Table.from_arrays(columns, schema=FUNDS_SCHEMA)
+
+
+def _convert_with_pyarrow(csv_files, output_file):
+    """
+    Stream CSV files into a single Parquet file using PyArrow.
+
+    CSVs are parsed in parallel worker processes and the resulting tables are
+    appended to a single ParquetWriter in this process. The output is written
+    to a temporary file and only replaces output_file once every file has been
+    processed, so an interrupted run leaves the previous output untouched.
+
+    Args:
+        csv_files: List of CSV paths
+        output_file: Path to output Parquet file
+
+    Returns:
+        True if any data was written
+    """
+    # Writer is opened lazily, so no file is written if nothing could be read
+    writer = None
+    tmp_file = f"{output_file}.tmp"
+
+    # Parse files in parallel and append each table as soon as it arrives instead of
+    # collecting every table first. The writer stays in this process.
+    try:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for csv_file, (fund_name, table) in zip(csv_files, executor.map(_read_one, csv_files, chunksize=1)):
+                if table is None:
+                    continue
 
-def convert_csv_to_parquet(input_folder='output', output_file='output/all_funds.parquet'):
+                try:
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_file, FUNDS_SCHEMA, **PARQUET_WRITE_OPTIONS)
+
+                    writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+                    logger.debug(f"Wrote {csv_file.name} ({table.num_rows} rows, category: {fund_name})")
+
+                except Exception as e:
+                    logger.error(f"Error writing {csv_file.name}: {e}")
+    except BaseException:
+        # Interrupted (e.g. a killed worker or Ctrl-C): drop the partial file
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_file)
+        raise
+
+    if writer is None:
+        return False
+
+    writer.close()
+    os.replace(tmp_file, output_file)
+    return True
+
+
+def _scan_one_polars(csv_file):
+    """
+    Lazily scan a single CSV with Polars, conformed to FUNDS_SCHEMA.
+
+    Args:
+        csv_file: Path to the CSV file
+
+    Returns:
+        LazyFrame with the FUNDS_SCHEMA columns in order
+    """
+    dtypes = {
+        **{col: pl.String for col in STRING_COLUMNS},
+        **{col: pl.Float64 if col in FLOAT64_COLUMNS else pl.Float32 for col in NUMERIC_COLUMNS}
+    }
+    lazy_frame = pl.scan_csv(csv_file, schema_overrides=dtypes, null_values=CSV_NULL_VALUES)
+
+    # Missing columns become nulls (reading the schema only parses the header)
+    present = lazy_frame.collect_schema().names()
+    missing = [
+        pl.lit(None, dtype=dtype).alias(col)
+        for col, dtype in dtypes.items() if col not in present
+    ]
+    if missing:
+        logger.warning(f"{csv_file.name} is missing columns, filling with nulls: {', '.join(e.meta.output_name() for e in missing)}")
+
+    return lazy_frame.with_columns(
+        *missing,
+        # Extract fund name from filename (e.g., etmoney_largecap.csv -> largecap)
+        pl.lit(csv_file.stem.replace('etmoney_', '')).cast(pl.Categorical).alias('fund_category')
+    ).select(FUNDS_SCHEMA.names)
+
+
+def _convert_with_polars(csv_files, output_file):
+    """
+    Stream CSV files into a single Parquet file using Polars.
+
+    Files are scanned lazily and sunk to Parquet in row-group sized chunks,
+    so the combined frame is never materialized. The output is written to a
+    temporary file and only replaces output_file on success. If the combined
+    plan fails, files that cannot be read on their own are skipped (as with
+    the pyarrow engine) and the rest are written.
+
+    Args:
+        csv_files: List of CSV paths
+        output_file: Path to output Parquet file
+
+    Returns:
+        True if any data was written
+    """
+    lazy_frames = {}
+    for csv_file in csv_files:
+        try:
+            lazy_frames[csv_file] = _scan_one_polars(csv_file)
+        except Exception as e:
+            logger.error(f"Error reading {csv_file.name}: {e}")
+
+    tmp_file = f"{output_file}.tmp"
+    for attempt in ('all', 'readable'):
+        if not lazy_frames:
+            return False
+
+        try:
+            pl.concat(list(lazy_frames.values())).sink_parquet(
+                tmp_file,
+                compression='zstd',
+                compression_level=3,
+                row_group_size=ROW_GROUP_SIZE,
+                statistics=True
+            )
+            os.replace(tmp_file, output_file)
+            return True
+        except Exception as e:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            if attempt == 'readable':
+                logger.error(f"Polars conversion failed: {e}")
+                return False
+            logger.warning(f"Polars conversion failed ({e}), skipping files that cannot be read")
+
+        # Find the failing files by collecting each one on its own
+        for csv_file, lazy_frame in list(lazy_frames.items()):
+            try:
+                lazy_frame.collect()
+            except Exception as e:
+                logger.error(f"Error reading {csv_file.name}: {e}")
+                del lazy_frames[csv_file]
+
+    return False
+
+
+def convert_csv_to_parquet(input_folder='output', output_file='output/all_funds.parquet',
+                           category_output_file='output/all_funds_by_category.parquet', engine='pyarrow'):
     """
     Convert all CSV files in the specified folder to a single Parquet file.
-    
+
+    Category aggregates used by the dashboard are written to a second file.
+
     Args:
         input_folder: Path to folder containing CSV files (default: 'output')
         output_file: Path to output Parquet file (default: 'output/all_funds.parquet')
+        category_output_file: Path to category aggregates Parquet file
+            (default: 'output/all_funds_by_category.parquet')
+        engine: 'pyarrow' (default) or 'polars'; falls back to pyarrow if Polars
+            is not installed
     """
     # Create Path object for the input folder
     input_path = Path(input_folder)
-    
+
     # Check if folder exists
     if not input_path.exists():
-        print(f"Error: Folder '{input_folder}' does not exist")
+        logger.error(f"Folder '{input_folder}' does not exist")
         return
-    
-    # Find all CSV files
-    csv_files = list(input_path.glob('*.csv'))
-    
+
+    # Find all CSV files (scandir reuses the directory entry info instead of a stat per path)
+    with os.scandir(input_path) as entries:
+        csv_files = [Path(entry.path) for entry in entries if entry.name.endswith('.csv') and entry.is_file()]
+
     if not csv_files:
-        print(f"No CSV files found in '{input_folder}' folder")
+        logger.warning(f"No CSV files found in '{input_folder}' folder")
         return
-    
-    print(f"Found {len(csv_files)} CSV file(s) to convert")
-    
-    # List to store all dataframes
-    all_dfs = []
-    
-    # Read each CSV and add fund category
-    for csv_file in csv_files:
-        try:
-            # Read CSV
-            print(f"Reading {csv_file.name}...", end=' ')
-            df = pd.read_csv(csv_file)
-            
-            # Extract fund name from filename (e.g., etmoney_largecap.csv -> largecap)
-            fund_name = csv_file.stem.replace('etmoney_', '')
-            
-            # Add fund_name column to the dataframe
-            df['fund_category'] = fund_name
-            
-            all_dfs.append(df)
-            print(f"✓ ({len(df)} rows, category: {fund_name})")
-            
-        except Exception as e:
-            print(f"✗ Error reading {csv_file.name}: {str(e)}")
-    
-    # Concatenate all dataframes
-    if all_dfs:
-        print(f"\nCombining {len(all_dfs)} dataframes...")
-        combined_df = pd.concat(all_dfs, ignore_index=True)
-        
-        # Save to Parquet
-        print(f"Saving to {output_file}...")
-        combined_df.to_parquet(output_file, index=False, engine='pyarrow')
-        
-        print(f"\n✓ Successfully created {output_file}")
-        print(f"  Total rows: {len(combined_df)}")
-        print(f"  Total columns: {len(combined_df.columns)}")
-        print(f"  Categories: {combined_df['fund_category'].nunique()}")
+
+    logger.info(f"Found {len(csv_files)} CSV file(s) to convert")
+
+    if engine == 'polars' and not POLARS_AVAILABLE:
+        logger.warning("Polars not available, falling back to pyarrow engine")
+        engine = 'pyarrow'
+
+    start_time = time.perf_counter()
+    if engine == 'polars':
+        written = _convert_with_polars(csv_files, output_file)
     else:
-        print("\nNo data to save")
-    
-    print("\nConversion complete!")
+        written = _convert_with_pyarrow(csv_files, output_file)
+
+    logger.info(f"Ingested {len(csv_files)} file(s) in {time.perf_counter() - start_time:.2f}s ({engine})")
+
+    if written:
+        # Row and column counts come from the footer; only the columns the aggregates
+        # need are read back, so the full dataset is never loaded into memory
+        metadata = pq.ParquetFile(output_file).metadata
+        funds = pq.read_table(output_file, columns=CATEGORY_STAT_COLUMNS + ['aum_cr', 'fund_category']).to_pandas()
+        logger.info(
+            f"Created {output_file}: {metadata.num_rows} rows, {metadata.num_columns} columns, "
+            f"{funds['fund_category'].nunique()} categories"
+        )
+
+        # Precompute category aggregates so the dashboard doesn't group on every rerun
+        logger.info(f"Saving category aggregates to {category_output_file}...")
+        category_stats = build_category_stats(funds)
+        category_stats.to_parquet(category_output_file, index=False, engine='pyarrow')
+        logger.info(f"Created {category_output_file} ({len(category_stats)} rows)")
+    else:
+        logger.warning("No data to save")
+
+    logger.info("Conversion complete!")
 
 
 if __name__ == '__main__':
-    convert_csv_to_parquet()
+    parser = argparse.ArgumentParser(
+        description='Convert scraped CSV files to Parquet',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['pyarrow', 'polars'],
+        default='pyarrow',
+        help='Conversion engine (polars must be installed separately)'
+    )
+    args = parser.parse_args()
+
+    convert_csv_to_parquet(engine=args.engine)
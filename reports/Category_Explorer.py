@@ -1,9 +1,11 @@
 """
 Mutual Fund Dashboard - Page 1: Category Tradeoff Explorer
 """
+import os
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import pyarrow.parquet as pq
 
 # Page config
 st.set_page_config(
@@ -12,149 +14,173 @@ st.set_page_config(
     layout="wide"
 )
 
+# Hover fields and axis labels for the category comparison chart
+AGG_HOVER = {
+    "fund_category": True,
+    "num_funds": True,
+    "return_1y": ":.2f",
+    "return_3y": ":.2f",
+    "return_5y": ":.2f",
+    "sharpe": ":.2f",
+    "expense_ratio": ":.2f",
+    "sd": ":.2f",
+    "aum_cr": ":.0f"
+}
+
+AGG_LABELS = {
+    "sd": "Avg Risk (SD)",
+    "return_1y": "Avg 1Y Return (%)",
+    "return_3y": "Avg 3Y Return (%)",
+    "return_5y": "Avg 5Y Return (%)",
+    "expense_ratio": "Avg Expense Ratio (%)",
+    "sharpe": "Avg Sharpe Ratio",
+    "alpha": "Avg Alpha",
+    "beta": "Avg Beta",
+    "aum_cr": "Total AUM (Cr)",
+    "fund_category": "Category",
+    "num_funds": "# of Funds"
+}
+
 # Load data
-@st.cache_data
-def load_data():
-    df = pd.read_parquet('output/all_funds.parquet')
+# Only these columns are read from the Parquet file
+USED_COLS = [
+    'fund_category', 'return_1m', 'return_3m', 'return_6m', 'return_1y', 'return_3y',
+    'return_5y', 'return_since_inception', 'sharpe', 'expense_ratio', 'sd', 'alpha',
+    'beta', 'aum_cr'
+]
+
+DATA_FILE = 'output/all_funds.parquet'
+CATEGORY_STATS_FILE = 'output/all_funds_by_category.parquet'
+
+# cache_resource hands back the same DataFrame on every rerun instead of
+# unpickling a copy; the pages only read from it and never modify it in place.
+# The file's mtime is part of the cache key, so a regenerated file is picked up.
+@st.cache_resource(max_entries=1)
+def load_data(mtime):
+    df = pq.read_table(DATA_FILE, columns=USED_COLS, use_threads=True).to_pandas()
     # Fill NaN values with 0 for AUM (size of bubble)
     df['aum_cr'] = df['aum_cr'].fillna(0)
     return df
 
-df = load_data()
+# AUM-weighted category averages for every view, precomputed by convert_to_parquet.py
+@st.cache_resource(max_entries=1)
+def load_category_stats(mtime):
+    return pq.read_table(CATEGORY_STATS_FILE).to_pandas()
+
+df = load_data(os.path.getmtime(DATA_FILE))
+category_stats_mtime = os.path.getmtime(CATEGORY_STATS_FILE)
+category_stats_all = load_category_stats(category_stats_mtime)
 
 # Title
 st.title("📊 Mutual Fund Category Explorer")
 
-# ===== SIDEBAR FILTERS =====
-with st.sidebar:
-    st.header("⚙️ Filters & Settings")
-    
-    # Get all categories
-    all_categories = sorted(df['fund_category'].unique().tolist())
-    selected_categories = all_categories  # Always show all categories in Graph 1
-    
-    # Return period selector
-    return_period_options = {
-        "1 Month": "return_1m",
-        "3 Months": "return_3m", 
-        "6 Months": "return_6m",
-        "1 Year": "return_1y",
-        "3 Years": "return_3y",
-        "5 Years": "return_5y",
-        "Since Inception": "return_since_inception"
-    }
-    
-    selected_period = st.selectbox(
-        "Return Period:",
-        options=list(return_period_options.keys()),
-        index=5  # Default to 5 Years
-    )
-    
-    return_col = return_period_options[selected_period]
-    
-    # View selector
-    view_options = {
-        "Return vs Risk (SD)": ("sd", "Risk-Return Tradeoff"),
-        "Return vs Expense Ratio": ("expense_ratio", "Return-Cost Tradeoff"),
-        "Sharpe vs Expense Ratio": ("expense_ratio", "Value Sweet Spot"),
-        "Alpha vs Beta": ("beta", "Excess Return vs Market Sensitivity")
-    }
-
-    selected_view = st.selectbox(
-        "View Type:",
-        options=list(view_options.keys()),
-        index=0
-    )
+# Get all categories
+all_categories = sorted(df['fund_category'].unique().tolist())
+selected_categories = all_categories  # Always show all categories in Graph 1
+
+# Filter dataframe by selected categories
+df_filtered_categories = df[df['fund_category'].isin(selected_categories)]
+
+# Return period options
+return_period_options = {
+    "1 Month": "return_1m",
+    "3 Months": "return_3m", 
+    "6 Months": "return_6m",
+    "1 Year": "return_1y",
+    "3 Years": "return_3y",
+    "5 Years": "return_5y",
+    "Since Inception": "return_since_inception"
+}
+
+# View options
+view_options = {
+    "Return vs Risk (SD)": ("sd", "Risk-Return Tradeoff"),
+    "Return vs Expense Ratio": ("expense_ratio", "Return-Cost Tradeoff"),
+    "Sharpe vs Expense Ratio": ("expense_ratio", "Value Sweet Spot"),
+    "Alpha vs Beta": ("beta", "Excess Return vs Market Sensitivity")
+}
 
 # ===== HELPER FUNCTIONS =====
-def get_filtered_data(dataframe, x_col, y_col):
-    """Filter data based on selected view (drop rows with NaN in x or y axis)"""
-    return dataframe.dropna(subset=[x_col, y_col, 'aum_cr'])
+@st.cache_data(show_spinner=False)
+def build_category_scatter(x_col, y_col, title_suffix, categories, data_version):
+    """Build the category comparison bubble chart, cached per view, category selection and data file version"""
+    # Look up the precomputed AUM-weighted averages for the selected view
+    category_stats = category_stats_all[
+        (category_stats_all['view_x'] == x_col) &
+        (category_stats_all['view_y'] == y_col) &
+        (category_stats_all['fund_category'].isin(categories))
+    ]
 
-# Get axis configuration
-x_col, title_suffix = view_options[selected_view]
+    fig = px.scatter(
+        category_stats,
+        x=x_col,
+        y=y_col,
+        size="aum_cr",
+        color="fund_category",
+        text="fund_category",
+        hover_data={**AGG_HOVER, x_col: ":.2f", y_col: ":.2f"},
+        title=f"{title_suffix} - Category Averages",
+        labels=AGG_LABELS,
+        size_max=60
+    )
 
-# Set y-axis based on view type
-if selected_view == "Sharpe vs Expense Ratio":
-    y_col = "sharpe"
-elif selected_view == "Alpha vs Beta":
-    y_col = "alpha"
-else:
-    y_col = return_col
+    # Add category labels on the plot
+    fig.update_traces(textposition='top center', textfont_size=10)
+    fig.update_layout(height=500, hovermode='closest')
+    return fig
 
 # ===== GRAPH 1: CATEGORY AGGREGATES =====
-st.subheader("📈 Graph 1: Category Comparison (AUM-Weighted Averages)")
+# Runs as a fragment: changing the return period or view only reruns this
+# block, not the data loading or the distribution box plots below
+@st.fragment
+def render_category_comparison():
+    st.subheader("📈 Graph 1: Category Comparison (AUM-Weighted Averages)")
 
-# Filter dataframe by selected categories
-df_filtered_categories = df[df['fund_category'].isin(selected_categories)]
-df_cat = get_filtered_data(df_filtered_categories, x_col, y_col)
-
-# Aggregate by category using AUM-weighted averages
-def weighted_avg(group, col):
-    weights = group['aum_cr']
-    return (group[col] * weights).sum() / weights.sum() if weights.sum() > 0 else group[col].mean()
-
-category_stats = df_cat.groupby('fund_category').apply(
-    lambda g: pd.Series({
-        x_col: weighted_avg(g, x_col),
-        y_col: weighted_avg(g, y_col),
-        'aum_cr': g['aum_cr'].sum(),
-        'sharpe': weighted_avg(g, 'sharpe'),
-        'expense_ratio': weighted_avg(g, 'expense_ratio'),
-        'sd': weighted_avg(g, 'sd'),
-        'num_funds': len(g),
-        'return_1y': weighted_avg(g, 'return_1y'),
-        'return_3y': weighted_avg(g, 'return_3y'),
-        'return_5y': weighted_avg(g, 'return_5y')
-    })
-).reset_index()
-
-fig1 = px.scatter(
-    category_stats,
-    x=x_col,
-    y=y_col,
-    size="aum_cr",
-    color="fund_category",
-    text="fund_category",
-    hover_data={
-        "fund_category": True,
-        "num_funds": True,
-        "return_1y": ":.2f",
-        "return_3y": ":.2f",
-        "return_5y": ":.2f",
-        "sharpe": ":.2f",
-        "expense_ratio": ":.2f",
-        "sd": ":.2f",
-        "aum_cr": ":.0f",
-        x_col: ":.2f",
-        y_col: ":.2f"
-    },
-    title=f"{title_suffix} - Category Averages",
-    labels={
-        "sd": "Avg Risk (SD)",
-        "return_1y": "Avg 1Y Return (%)",
-        "return_3y": "Avg 3Y Return (%)",
-        "return_5y": "Avg 5Y Return (%)",
-        "expense_ratio": "Avg Expense Ratio (%)",
-        "sharpe": "Avg Sharpe Ratio",
-        "alpha": "Avg Alpha",
-        "beta": "Avg Beta",
-        "aum_cr": "Total AUM (Cr)",
-        "fund_category": "Category",
-        "num_funds": "# of Funds"
-    },
-    size_max=60
-)
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Return period selector
+        selected_period = st.selectbox(
+            "Return Period:",
+            options=list(return_period_options.keys()),
+            index=5  # Default to 5 Years
+        )
 
-# Add category labels on the plot
-fig1.update_traces(textposition='top center', textfont_size=10)
-fig1.update_layout(height=500, hovermode='closest')
+    with col2:
+        # View selector
+        selected_view = st.selectbox(
+            "View Type:",
+            options=list(view_options.keys()),
+            index=0
+        )
+
+    return_col = return_period_options[selected_period]
+
+    # Get axis configuration
+    x_col, title_suffix = view_options[selected_view]
 
-st.plotly_chart(fig1, use_container_width=True)
+    # Set y-axis based on view type
+    if selected_view == "Sharpe vs Expense Ratio":
+        y_col = "sharpe"
+    elif selected_view == "Alpha vs Beta":
+        y_col = "alpha"
+    else:
+        y_col = return_col
+
+    fig1 = build_category_scatter(x_col, y_col, title_suffix, tuple(selected_categories), category_stats_mtime)
+
+    st.plotly_chart(fig1, use_container_width=True)
+
+render_category_comparison()
 
 # ===== BOX PLOTS: DISTRIBUTION ANALYSIS =====
 st.subheader("📦 Distribution Analysis by Category")
 
+# Per-category medians of every plotted metric in one groupby, used to order the box plots
+category_medians = df_filtered_categories.groupby('fund_category', observed=True, sort=False)[
+    ['return_5y', 'return_3y', 'return_1y', 'sharpe', 'sd', 'beta', 'expense_ratio', 'aum_cr']
+].median()
+
 # Create tabs for different metric groups
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Returns", "⚖️ Risk-Adjusted Returns", "⚠️ Risk Metrics", "💰 Cost", "📊 Fund Size"])
 
@@ -162,9 +188,9 @@ with tab1:
     st.markdown("### Return Distribution Across Categories")
     
     # Calculate median order for sorting
-    category_order_5y = df_filtered_categories.groupby('fund_category')['return_5y'].median().sort_values(ascending=False).index.tolist()
-    category_order_3y = df_filtered_categories.groupby('fund_category')['return_3y'].median().sort_values(ascending=False).index.tolist()
-    category_order_1y = df_filtered_categories.groupby('fund_category')['return_1y'].median().sort_values(ascending=False).index.tolist()
+    category_order_5y = category_medians['return_5y'].sort_values(ascending=False).index.tolist()
+    category_order_3y = category_medians['return_3y'].sort_values(ascending=False).index.tolist()
+    category_order_1y = category_medians['return_1y'].sort_values(ascending=False).index.tolist()
     
     col1, col2, col3 = st.columns(3)
     
@@ -209,7 +235,7 @@ with tab1:
 
 with tab2:
     st.markdown("### Risk-Adjusted Return Distribution Across Categories")
-    category_order_sharpe = df_filtered_categories.groupby('fund_category')['sharpe'].median().sort_values(ascending=False).index.tolist()
+    category_order_sharpe = category_medians['sharpe'].sort_values(ascending=False).index.tolist()
     
     fig_sharpe = px.box(
         df_filtered_categories,
@@ -229,8 +255,8 @@ with tab3:
     st.markdown("### Risk Metrics Distribution Across Categories")
     col1, col2 = st.columns(2)
     
-    category_order_sd = df_filtered_categories.groupby('fund_category')['sd'].median().sort_values().index.tolist()
-    category_order_beta = df_filtered_categories.groupby('fund_category')['beta'].median().sort_values().index.tolist()
+    category_order_sd = category_medians['sd'].sort_values().index.tolist()
+    category_order_beta = category_medians['beta'].sort_values().index.tolist()
     
     with col1:
         fig_sd = px.box(
@@ -260,7 +286,7 @@ with tab3:
 
 with tab4:
     st.markdown("### Expense Ratio Distribution Across Categories")
-    category_order_expense = df_filtered_categories.groupby('fund_category')['expense_ratio'].median().sort_values().index.tolist()
+    category_order_expense = category_medians['expense_ratio'].sort_values().index.tolist()
     
     fig_expense = px.box(
         df_filtered_categories,
@@ -276,7 +302,7 @@ with tab4:
 
 with tab5:
     st.markdown("### AUM Distribution Across Categories")
-    category_order_aum = df_filtered_categories.groupby('fund_category')['aum_cr'].median().sort_values(ascending=False).index.tolist()
+    category_order_aum = category_medians['aum_cr'].sort_values(ascending=False).index.tolist()
     
     fig_aum = px.box(
         df_filtered_categories,
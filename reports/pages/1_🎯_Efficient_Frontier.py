@@ -1,21 +1,66 @@
 """
 Mutual Fund Dashboard - Page 2: Efficient Frontier Analysis
 """
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import pyarrow.parquet as pq
 
 # Page config
 st.set_page_config(page_title="MF Dashboard - Efficient Frontier", layout="wide")
 
 # Load data
-@st.cache_data
-def load_data():
-    df = pd.read_parquet('output/all_funds.parquet')
+# Only these columns are read from the Parquet file
+USED_COLS = [
+    'fund_name', 'fund_category', 'fund_age_years', 'return_1m', 'return_3m',
+    'return_6m', 'return_1y', 'return_3y', 'return_5y', 'return_since_inception',
+    'sharpe', 'expense_ratio', 'sd', 'alpha', 'beta', 'aum_cr'
+]
+
+# Hover fields and axis labels for the frontier chart
+FUND_HOVER = {
+    "return_1y": ":.2f",
+    "return_3y": ":.2f",
+    "return_5y": ":.2f",
+    "sharpe": ":.2f",
+    "expense_ratio": ":.2f",
+    "sd": ":.2f",
+    "aum_cr": ":.0f",
+    "is_efficient": False,
+    "frontier_status": True
+}
+
+FUND_LABELS = {
+    "sd": "Standard Deviation (Risk)",
+    "return_1y": "1-Year Return (%)",
+    "return_3y": "3-Year Return (%)",
+    "return_5y": "5-Year Return (%)",
+    "expense_ratio": "Expense Ratio (%)",
+    "sharpe": "Sharpe Ratio",
+    "alpha": "Alpha",
+    "beta": "Beta",
+    "aum_cr": "AUM (Crores)",
+    "frontier_status": "Status"
+}
+
+# Upper bound on points sent to the browser for the frontier chart
+MAX_PLOT_POINTS = 5000
+
+DATA_FILE = 'output/all_funds.parquet'
+
+# Shared (not copied) across reruns - treat as read-only. Keyed on the file's
+# mtime so a regenerated Parquet file replaces the cached frame.
+@st.cache_resource(max_entries=1)
+def load_data(mtime):
+    df = pq.read_table(DATA_FILE, columns=USED_COLS, use_threads=True).to_pandas()
     df['aum_cr'] = df['aum_cr'].fillna(0)
     return df
 
-df = load_data()
+data_mtime = os.path.getmtime(DATA_FILE)
+df = load_data(data_mtime)
 
 # Title
 st.title("🎯 Efficient Frontier Analysis")
@@ -140,10 +185,27 @@ with st.sidebar:
         step=0.5
     )
 
+    st.markdown("---")
+    show_all_points = st.checkbox(
+        "Plot all funds (slow)",
+        value=False,
+        help=f"By default the chart plots at most {MAX_PLOT_POINTS:,} funds"
+    )
+
 # ===== HELPER FUNCTIONS =====
-def get_filtered_data(dataframe, x_col, y_col):
-    """Filter data based on selected view (drop rows with NaN in x or y axis)"""
-    return dataframe.dropna(subset=[x_col, y_col, 'aum_cr'])
+# Only row positions are cached (shared, not copied per rerun); callers slice the
+# cached frame with them, so each rerun copies just the selected category's rows
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_filtered_rows(x_col, y_col, category, data_version):
+    """Row positions of a category's funds with x, y and AUM values, cached per view, category and data file version"""
+    # Single vectorised pass over the numeric columns instead of dropna()
+    mask = (
+        np.isfinite(df[x_col].to_numpy()) &
+        np.isfinite(df[y_col].to_numpy()) &
+        np.isfinite(df['aum_cr'].to_numpy()) &
+        (df['fund_category'] == category).to_numpy()
+    )
+    return np.flatnonzero(mask)
 
 def is_pareto_efficient(df, x_col, y_col):
     """
@@ -183,8 +245,7 @@ else:
 st.subheader(f"📊 {single_category} - {title_suffix}")
 
 # Filter for single category
-df_single = df[df['fund_category'] == single_category]
-df_single = get_filtered_data(df_single, x_col, y_col)
+df_single = df.iloc[get_filtered_rows(x_col, y_col, single_category, data_mtime)]
 
 # Apply user filters
 df_single = df_single[
@@ -208,42 +269,28 @@ else:
 df_single['is_efficient'] = is_pareto_efficient(df_single, x_col, y_col)
 df_single['frontier_status'] = df_single['is_efficient'].map({True: 'Efficient Frontier', False: 'Dominated'})
 
+# Cap the plotted points: keep every frontier fund, fill the rest with the largest dominated funds by AUM
+df_plot = df_single
+if not show_all_points and len(df_single) > MAX_PLOT_POINTS:
+    df_efficient = df_single[df_single['is_efficient']]
+    df_dominated = df_single[~df_single['is_efficient']].nlargest(max(0, MAX_PLOT_POINTS - len(df_efficient)), 'aum_cr')
+    df_plot = pd.concat([df_efficient, df_dominated])
+    st.caption(f"Chart shows {len(df_plot)} of {len(df_single)} funds (frontier funds plus largest by AUM)")
+
 fig = px.scatter(
-    df_single,
+    df_plot,
     x=x_col,
     y=y_col,
     size="aum_cr",
     color="frontier_status",
     symbol="frontier_status",
     hover_name="fund_name",
-    hover_data={
-        "return_1y": ":.2f",
-        "return_3y": ":.2f",
-        "return_5y": ":.2f",
-        "sharpe": ":.2f",
-        "expense_ratio": ":.2f",
-        "sd": ":.2f",
-        "aum_cr": ":.0f",
-        "is_efficient": False,
-        "frontier_status": True,
-        x_col: ":.2f",
-        y_col: ":.2f"
-    },
+    hover_data={**FUND_HOVER, x_col: ":.2f", y_col: ":.2f"},
     title=f"Pareto-Efficient Frontier Analysis",
-    labels={
-        "sd": "Standard Deviation (Risk)",
-        "return_1y": "1-Year Return (%)",
-        "return_3y": "3-Year Return (%)",
-        "return_5y": "5-Year Return (%)",
-        "expense_ratio": "Expense Ratio (%)",
-        "sharpe": "Sharpe Ratio",
-        "alpha": "Alpha",
-        "beta": "Beta",
-        "aum_cr": "AUM (Crores)",
-        "frontier_status": "Status"
-    },
+    labels=FUND_LABELS,
     color_discrete_map={"Efficient Frontier": "#00CC96", "Dominated": "#636EFA"},
-    size_max=30
+    size_max=30,
+    render_mode='webgl'  # One fund per point - draw on a WebGL canvas instead of SVG nodes
 )
 
 fig.update_layout(